@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from letta_client import Letta
 from dotenv import load_dotenv
@@ -6,8 +6,17 @@ import os
 import traceback
 from flask import send_file
 import zipfile
+import gzip
 import io
 import re
+import time
+from spec_index import load_spec_index
+from result_store import load_result_store
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # ------------------ Load Environment ------------------
 
@@ -25,11 +34,17 @@ if not pm_agent_id or not swe_agent_id:
 client = Letta(token=letta_api_key)
 pm_agent = client.agents.retrieve(pm_agent_id)
 swe_agent = client.agents.retrieve(swe_agent_id)
+spec_index = load_spec_index()
+result_store = load_result_store()
 
 # ------------------ Flask App ------------------
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["ETag", "Content-Range", "Accept-Ranges"])
+
+# Responses smaller than this are sent uncompressed.
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_ENCODINGS = ["br", "gzip"]
 
 PM_REQUIRED_SECTIONS = [
     "Purpose and Functionality",
@@ -45,6 +60,9 @@ PM_REQUIRED_SECTIONS = [
 
 # ------------------ Helper Functions ------------------
 
+class AgentError(Exception):
+    """Raised when a Letta agent call fails, so errors aren't mistaken for agent replies."""
+
 def send_to_agent(agent_id: str, message: str) -> str:
     try:
         response = client.agents.messages.create(
@@ -57,7 +75,7 @@ def send_to_agent(agent_id: str, message: str) -> str:
         return "No assistant message found."
     except Exception as e:
         traceback.print_exc()
-        return f"❌ Agent Error: {e}"
+        raise AgentError(f"❌ Agent Error: {e}") from e
 
 def check_requirements_complete(requirements: str) -> list:
     checklist = ", ".join(PM_REQUIRED_SECTIONS)
@@ -80,7 +98,7 @@ Only return section names, separated by commas.
 def generate_missing_sections_question(missing_sections: list) -> str:
     return "To proceed, please provide more details on the following sections: " + ", ".join(missing_sections) + "."
 
-def pm_create_instructions(requirements: str) -> str:
+def pm_create_instructions(requirements: str, prior: dict = None) -> str:
     prompt = f"""
 Given the following user requirements:
 
@@ -94,10 +112,18 @@ Draft a detailed and structured technical spec for an application. Do not repeat
 - Any technical architecture recommendations
 
 Do not ask for approval — assume approval and proceed.
+"""
+    if prior:
+        prompt += f"""
+A very similar request was already approved with the spec below. Use it as your starting template:
+keep what still applies, and change only what these requirements need differently.
+
+Prior Spec:
+\"\"\"{prior["spec"]}\"\"\"
 """
     return send_to_agent(pm_agent.id, prompt)
 
-def swe_implement_code(pm_instructions: str) -> str:
+def swe_implement_code(pm_instructions: str, seed_code: str = None) -> str:
     prompt = f"""
 You are a senior mobile engineer on a product team.
 
@@ -107,16 +133,26 @@ The PM has finalized and approved the following technical spec. Your task is to
 🛑 Do NOT summarize or explain.  
 ✅ Only return valid, production-ready code for a React Native app.  
 ✅ Wrap your response in code blocks and assume it's being pasted into a real repo.
+✅ Put a "### File: <path>" line directly above each file's code block.
 
 ---
 
 PM Spec:
 \"\"\"{pm_instructions}\"\"\"
+"""
+    if seed_code:
+        prompt += f"""
+Start from this previously approved implementation of a very similar app and adapt it to the spec above,
+rather than writing everything from scratch. Keep the same "### File: <path>" layout.
+
+Prior Code:
+{seed_code}
 """
     return send_to_agent(swe_agent.id, prompt)
 
-def run_interaction_loop(spec: str) -> dict:
-    swe_code = swe_implement_code(spec)
+def run_interaction_loop(spec: str, seed_code: str = None, max_rounds: int = None) -> dict:
+    """Alternate PM review and SWE revision until the PM approves or max_rounds is reached."""
+    swe_code = swe_implement_code(spec, seed_code)
     round_num = 1
 
     while True:
@@ -142,6 +178,14 @@ Provide feedback, suggestions, or reply 'Approved' to finalize.
                 "pm_feedback": pm_feedback
             }
 
+        if max_rounds is not None and round_num >= max_rounds:
+            return {
+                "status": "max_rounds",
+                "rounds": round_num,
+                "final_code": swe_code,
+                "pm_feedback": pm_feedback
+            }
+
         swe_code = send_to_agent(swe_agent.id, f"""
 Revise the code according to this PM feedback:
 
@@ -152,6 +196,28 @@ Previous code:
 """)
         round_num += 1
 
+def generate_project(requirements: str, max_rounds: int = None) -> dict:
+    """Spec and implement complete requirements, reusing the nearest approved generation if any."""
+    prior = spec_index.find_similar(requirements)
+
+    t0 = time.monotonic()
+    spec = pm_create_instructions(requirements, prior)
+    spec_seconds = time.monotonic() - t0
+
+    t0 = time.monotonic()
+    gan_result = run_interaction_loop(spec, prior["code"] if prior else None, max_rounds)
+    gan_result["timings"] = {
+        "spec": round(spec_seconds, 3),
+        "implement_review": round(time.monotonic() - t0, 3),
+    }
+
+    if gan_result["status"] == "satisfied":
+        spec_index.add(requirements, spec, gan_result["final_code"])
+
+    gan_result["spec"] = spec
+    gan_result["seeded_from"] = {"id": prior["id"], "score": prior["score"]} if prior else None
+    return gan_result
+
 # ------------------ Routes ------------------
 def extract_files_from_code_output(output: str) -> dict:
     """Parse code blocks from SWE response into {file_path: code}."""
@@ -162,6 +228,79 @@ def extract_files_from_code_output(output: str) -> dict:
         files[path.strip()] = content.strip()
     return files
 
+def build_zip(files: dict) -> io.BytesIO:
+    """Package {file_path: content} into an in-memory zip archive."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for path, content in files.items():
+            zipf.writestr(path, content)
+
+    zip_buffer.seek(0)
+    return zip_buffer
+
+def build_project_zip(code: str) -> io.BytesIO:
+    """Package the files in a SWE response into an in-memory zip archive."""
+    return build_zip(extract_files_from_code_output(code))
+
+def store_result(code: str, artifacts: dict, meta: dict = None) -> dict:
+    """Save generated files and text artifacts server-side and return the manifest."""
+    return result_store.save(extract_files_from_code_output(code), artifacts, meta)
+
+def conditional_response(response: Response, etag: str, **kwargs) -> Response:
+    """Apply If-None-Match, Range and If-Range to a response for the identity representation.
+
+    Compressed responses carry "<etag>-<encoding>" (see compress_response), so a client
+    holding any encoding of the same content still gets a 304. Range requests are only
+    served against the plain etag, which keeps If-Range with a compressed tag from
+    returning a slice of bytes the client never saw.
+    """
+    for tag in [etag] + [f"{etag}-{encoding}" for encoding in COMPRESS_ENCODINGS]:
+        if request.if_none_match.contains_weak(tag):
+            not_modified = Response(status=304)
+            not_modified.set_etag(tag)
+            return not_modified
+
+    response.set_etag(etag)
+    return response.make_conditional(request, **kwargs)
+
+def blob_response(entry: dict) -> Response:
+    """Serve a stored blob with its content hash as ETag, honoring If-None-Match and Range."""
+    response = Response(result_store.get_blob(entry["hash"]), mimetype="text/plain")
+    # Let browsers cache blobs but revalidate them with If-None-Match.
+    response.cache_control.no_cache = True
+    return conditional_response(response, entry["hash"], accept_ranges=True, complete_length=entry["size"])
+
+@app.after_request
+def compress_response(response):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype == "application/zip"
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        encoding, data = "br", brotli.compress(data)
+    elif accepted["gzip"]:
+        encoding, data = "gzip", gzip.compress(data)
+    else:
+        return response
+
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    etag, weak = response.get_etag()
+    if etag:
+        # The encoded bytes are a different representation, so they get their own strong tag.
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
 @app.route("/download-zip", methods=["POST"])
 def download_zip():
     try:
@@ -170,14 +309,7 @@ def download_zip():
         if not code:
             return jsonify({"error": "No code provided"}), 400
 
-        files = extract_files_from_code_output(code)
-
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for path, content in files.items():
-                zipf.writestr(path, content)
-
-        zip_buffer.seek(0)
+        zip_buffer = build_project_zip(code)
         return send_file(
             zip_buffer,
             mimetype="application/zip",
@@ -201,15 +333,26 @@ def chat():
             clarification = generate_missing_sections_question(missing_sections)
             return jsonify({"reply": clarification, "missing_sections": missing_sections})
 
-        pm_response = pm_create_instructions(user_message)
-        gan_result = run_interaction_loop(pm_response)
+        gan_result = generate_project(user_message)
+        manifest = store_result(
+            gan_result["final_code"],
+            {"generated_code": gan_result["final_code"], "pm_feedback": gan_result["pm_feedback"]},
+            {"status": gan_result["status"], "rounds": gan_result["rounds"]},
+        )
 
-        return jsonify({
+        result = {
             "status": gan_result["status"],
             "rounds": gan_result["rounds"],
-            "generated_code": gan_result["final_code"],
-            "pm_feedback": gan_result["pm_feedback"]
-        })
+            "seeded_from": gan_result["seeded_from"],
+            "result_id": manifest["id"],
+            "files": manifest["files"],
+            "artifacts": manifest["artifacts"]
+        }
+        # Compact clients fetch file contents from /results/<result_id> instead.
+        if not data.get("compact"):
+            result["generated_code"] = gan_result["final_code"]
+            result["pm_feedback"] = gan_result["pm_feedback"]
+        return jsonify(result)
 
     except Exception as e:
         traceback.print_exc()
@@ -227,16 +370,68 @@ def iterate():
 
         pm_reply = pm_create_instructions(user_context)
         swe_reply = swe_implement_code(pm_reply)
-
-        return jsonify({
-            "pm_reply": pm_reply,
-            "generated_code": swe_reply
-        })
+        manifest = store_result(swe_reply, {"generated_code": swe_reply, "pm_reply": pm_reply})
+
+        result = {
+            "result_id": manifest["id"],
+            "files": manifest["files"],
+            "artifacts": manifest["artifacts"]
+        }
+        if not data.get("compact"):
+            result["pm_reply"] = pm_reply
+            result["generated_code"] = swe_reply
+        return jsonify(result)
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route("/results/<result_id>", methods=["GET"])
+def get_result(result_id):
+    manifest = result_store.get_manifest(result_id)
+    if manifest is None:
+        return jsonify({"error": "Result not found"}), 404
+
+    # Manifests are never rewritten, so the result id is a stable ETag.
+    return conditional_response(jsonify(manifest), manifest["id"])
+
+@app.route("/results/<result_id>/files/<path:file_path>", methods=["GET"])
+def get_result_file(result_id, file_path):
+    manifest = result_store.get_manifest(result_id)
+    entry = manifest and result_store.find_file(manifest, file_path)
+    if not entry:
+        return jsonify({"error": "File not found"}), 404
+    return blob_response(entry)
+
+@app.route("/results/<result_id>/artifacts/<name>", methods=["GET"])
+def get_result_artifact(result_id, name):
+    manifest = result_store.get_manifest(result_id)
+    entry = manifest and manifest["artifacts"].get(name)
+    if not entry:
+        return jsonify({"error": "Artifact not found"}), 404
+    return blob_response(entry)
+
+@app.route("/results/<result_id>/zip", methods=["GET"])
+def download_result_zip(result_id):
+    manifest = result_store.get_manifest(result_id)
+    if manifest is None:
+        return jsonify({"error": "Result not found"}), 404
+
+    files = {
+        entry["path"]: result_store.get_blob(entry["hash"]).decode("utf-8")
+        for entry in manifest["files"]
+    }
+    return send_file(
+        build_zip(files),
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name="project.zip"
+    )
+
+@app.route("/spec-index/stats", methods=["GET"])
+def spec_index_stats():
+    return jsonify(spec_index.stats())
+
 # ------------------ Run ------------------
 
 if __name__ == "__main__":
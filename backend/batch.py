@@ -0,0 +1,197 @@
+"""Generate projects in bulk without going through the Flask server.
+
+Usage:
+    python batch.py requirements/ --out generated/ --workers 4
+    python batch.py requirements.jsonl --out generated/
+
+Inputs are either a directory of requirement documents (one ``.txt`` or
+``.md`` file per project) or a JSONL file with one
+``{"id": ..., "requirements": ...}`` object per line. Each input runs through
+the same completeness -> spec -> implement/review pipeline as ``/chat`` and
+produces ``<out>/<id>.zip`` in the ``/download-zip`` format. Per-item status,
+rounds and timings are recorded in ``<out>/summary.json``; re-running the
+command skips items that already finished. Items the PM hasn't approved after
+``--max-rounds`` review rounds, or whose agent calls fail, are reported and
+retried on the next run.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import (
+    build_zip,
+    check_requirements_complete,
+    extract_files_from_code_output,
+    generate_project,
+)
+
+REQUIREMENT_EXTENSIONS = (".txt", ".md")
+SUMMARY_FILENAME = "summary.json"
+DEFAULT_MAX_ROUNDS = 5
+
+# ------------------ Inputs ------------------
+
+def safe_item_id(raw_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(raw_id)).strip("._") or "item"
+
+def load_inputs(source: str) -> list:
+    """Return a list of {"id", "requirements"} dicts from a directory or JSONL file."""
+    items = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            stem, ext = os.path.splitext(name)
+            if not os.path.isfile(path) or ext.lower() not in REQUIREMENT_EXTENSIONS:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                items.append({"id": safe_item_id(stem), "requirements": f.read().strip()})
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            for line_num, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                requirements = record.get("requirements") or record.get("message") or ""
+                item_id = record.get("id", f"item-{line_num}")
+                items.append({"id": safe_item_id(item_id), "requirements": requirements.strip()})
+
+    seen = set()
+    for item in items:
+        if item["id"] in seen:
+            raise ValueError(f"Duplicate input id: {item['id']}")
+        seen.add(item["id"])
+    return items
+
+# ------------------ Summary ------------------
+
+def load_summary(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("items", {})
+
+def write_summary(path: str, items: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"items": items}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def is_finished(entry: dict, zip_path: str) -> bool:
+    return bool(entry) and entry.get("status") == "satisfied" and os.path.exists(zip_path)
+
+# ------------------ Pipeline ------------------
+
+def run_item(item: dict, out_dir: str, max_rounds: int) -> dict:
+    """Run the full pipeline for one requirements document and write its zip."""
+    timings = {}
+    started = time.monotonic()
+
+    if not item["requirements"]:
+        return {"status": "error", "error": "Empty requirements", "timings": timings}
+
+    try:
+        t0 = time.monotonic()
+        missing_sections = check_requirements_complete(item["requirements"])
+        timings["completeness"] = round(time.monotonic() - t0, 3)
+        if missing_sections:
+            timings["total"] = round(time.monotonic() - started, 3)
+            return {"status": "missing_info", "missing_sections": missing_sections, "timings": timings}
+
+        gan_result = generate_project(item["requirements"], max_rounds)
+        timings.update(gan_result["timings"])
+
+        if gan_result["status"] != "satisfied":
+            timings["total"] = round(time.monotonic() - started, 3)
+            return {
+                "status": gan_result["status"],
+                "rounds": gan_result["rounds"],
+                "error": f"PM did not approve the code within {max_rounds} rounds",
+                "timings": timings,
+            }
+
+        files = extract_files_from_code_output(gan_result["final_code"])
+        if not files:
+            timings["total"] = round(time.monotonic() - started, 3)
+            return {
+                "status": "error",
+                "rounds": gan_result["rounds"],
+                "error": "No '### File:' blocks found in generated code",
+                "timings": timings,
+            }
+
+        # Write to a temporary name first so a zip on disk always means a finished item.
+        zip_path = os.path.join(out_dir, f"{item['id']}.zip")
+        tmp_path = zip_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(build_zip(files).getvalue())
+        os.replace(tmp_path, zip_path)
+
+        timings["total"] = round(time.monotonic() - started, 3)
+        return {
+            "status": gan_result["status"],
+            "rounds": gan_result["rounds"],
+            "seeded_from": gan_result["seeded_from"],
+            "files": len(files),
+            "zip": os.path.basename(zip_path),
+            "timings": timings,
+        }
+    except Exception as e:
+        traceback.print_exc()
+        timings["total"] = round(time.monotonic() - started, 3)
+        return {"status": "error", "error": str(e), "timings": timings}
+
+def run_batch(source: str, out_dir: str, workers: int, max_rounds: int = DEFAULT_MAX_ROUNDS) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    summary_path = os.path.join(out_dir, SUMMARY_FILENAME)
+    summary = load_summary(summary_path)
+
+    items = load_inputs(source)
+    pending = []
+    for item in items:
+        zip_path = os.path.join(out_dir, f"{item['id']}.zip")
+        if is_finished(summary.get(item["id"]), zip_path):
+            print(f"⏭️  Skipping {item['id']} (already finished)")
+            continue
+        pending.append(item)
+
+    print(f"Running {len(pending)} of {len(items)} items with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_item, item, out_dir, max_rounds): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            entry = future.result()
+            summary[item["id"]] = entry
+            write_summary(summary_path, summary)
+            rounds = entry.get("rounds", "-")
+            total = entry["timings"].get("total", 0)
+            print(f"{'✅' if entry['status'] == 'satisfied' else '❌'} {item['id']}: "
+                  f"{entry['status']} (rounds: {rounds}, {total}s)")
+
+    return summary
+
+# ------------------ CLI ------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate projects in bulk from requirement documents.")
+    parser.add_argument("source", help="Directory of .txt/.md requirement files, or a JSONL file")
+    parser.add_argument("--out", default="generated", help="Output directory for zips and summary.json")
+    parser.add_argument("--workers", type=int, default=4, help="Number of items to generate concurrently")
+    parser.add_argument("--max-rounds", type=int, default=DEFAULT_MAX_ROUNDS,
+                        help="Give up on an item after this many PM review rounds")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.max_rounds < 1:
+        parser.error("--max-rounds must be at least 1")
+
+    run_batch(args.source, args.out, args.workers, args.max_rounds)
+
+if __name__ == "__main__":
+    main()
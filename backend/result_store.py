@@ -0,0 +1,149 @@
+"""Server-side storage for generated projects.
+
+Each result is saved as a small manifest listing its files with their content
+hash and size; file contents live in a content-addressed blob directory, so a
+file that is unchanged between revisions is stored once and keeps the same
+hash (which the routes use as its ETag).
+
+Layout under RESULT_STORE_DIR (default: results/):
+    blobs/<sha256>         raw file and artifact contents
+    manifests/<id>.json    one manifest per result
+
+Only the newest RESULT_STORE_MAX_RESULTS results (default: 500, 0 keeps
+everything) are kept; older manifests are deleted on save, along with blobs no
+remaining manifest references. Deleting the whole directory while the server
+is stopped is also safe; it is recreated on startup.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+DEFAULT_STORE_DIR = "results"
+DEFAULT_MAX_RESULTS = 500
+
+# Unreferenced blobs younger than this are kept, since a save in progress may
+# have written (or reused) them before its manifest exists.
+BLOB_GRACE_SECONDS = 3600
+
+RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class ResultStore:
+    def __init__(self, root: str = DEFAULT_STORE_DIR, max_results: int = DEFAULT_MAX_RESULTS):
+        self.root = root
+        self.max_results = max_results
+        self.blob_dir = os.path.join(root, "blobs")
+        self.manifest_dir = os.path.join(root, "manifests")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put_blob(self, content: str) -> dict:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.blob_dir, digest)
+        if os.path.exists(path):
+            # Refresh the mtime so pruning treats a reused blob as recently written.
+            os.utime(path)
+        else:
+            self._write_atomic(path, data)
+        return {"hash": digest, "size": len(data)}
+
+    def get_blob(self, digest: str) -> bytes:
+        with open(os.path.join(self.blob_dir, digest), "rb") as f:
+            return f.read()
+
+    def save(self, files: dict, artifacts: dict, meta: dict = None) -> dict:
+        """Store {path: content} files plus named text artifacts and return the manifest."""
+        manifest = {
+            "id": uuid.uuid4().hex,
+            "created_at": time.time(),
+            **(meta or {}),
+            "files": [
+                {"path": path, **self.put_blob(content)}
+                for path, content in sorted(files.items())
+            ],
+            "artifacts": {
+                name: self.put_blob(content)
+                for name, content in artifacts.items() if content is not None
+            },
+        }
+        path = os.path.join(self.manifest_dir, f"{manifest['id']}.json")
+        self._write_atomic(path, json.dumps(manifest).encode("utf-8"))
+        self.prune()
+        return manifest
+
+    def prune(self):
+        """Delete manifests beyond max_results (oldest first) and blobs they alone used."""
+        if not self.max_results:
+            return
+
+        manifests = []
+        for name in os.listdir(self.manifest_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.manifest_dir, name)
+            try:
+                manifests.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+        if len(manifests) <= self.max_results:
+            return
+
+        manifests.sort()
+        for _, path in manifests[:-self.max_results]:
+            self._remove(path)
+
+        referenced = set()
+        for _, path in manifests[-self.max_results:]:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                continue
+            referenced.update(entry["hash"] for entry in manifest["files"])
+            referenced.update(entry["hash"] for entry in manifest["artifacts"].values())
+
+        cutoff = time.time() - BLOB_GRACE_SECONDS
+        for digest in os.listdir(self.blob_dir):
+            path = os.path.join(self.blob_dir, digest)
+            try:
+                if digest not in referenced and os.path.getmtime(path) < cutoff:
+                    self._remove(path)
+            except FileNotFoundError:
+                continue
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get_manifest(self, result_id: str):
+        if not RESULT_ID_PATTERN.match(result_id):
+            return None
+        path = os.path.join(self.manifest_dir, f"{result_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def find_file(self, manifest: dict, file_path: str):
+        for entry in manifest["files"]:
+            if entry["path"] == file_path:
+                return entry
+        return None
+
+def load_result_store() -> ResultStore:
+    return ResultStore(
+        root=os.getenv("RESULT_STORE_DIR", DEFAULT_STORE_DIR),
+        max_results=int(os.getenv("RESULT_STORE_MAX_RESULTS", DEFAULT_MAX_RESULTS)),
+    )
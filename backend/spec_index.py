@@ -0,0 +1,155 @@
+"""Local similarity index over past requirements and their approved artifacts.
+
+Stores every approved generation (requirements text, PM spec and final code)
+in a SQLite database and finds the closest prior entry for new requirements
+using TF-IDF cosine similarity over word unigrams and bigrams. No external
+service is involved, and SQLite lets the Flask app and the batch CLI share
+one index file: each process picks up rows the other added on its next lookup.
+Entries are keyed by a hash of the requirements text, so re-running identical
+requirements replaces the stored artifacts instead of adding a duplicate.
+
+Configuration (environment variables):
+    SPEC_INDEX_PATH       SQLite file backing the index (default: spec_index.db)
+    SPEC_INDEX_THRESHOLD  Minimum cosine similarity for a match (default: 0.6)
+"""
+
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+DEFAULT_INDEX_PATH = "spec_index.db"
+DEFAULT_THRESHOLD = 0.6
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "be", "by", "for", "from", "i", "in", "is", "it", "of",
+    "on", "or", "should", "that", "the", "this", "to", "use", "using", "want", "we", "with",
+}
+
+# ------------------ Text Helpers ------------------
+
+def tokenize(text: str) -> list:
+    words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+    bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return words + bigrams
+
+def cosine_similarity(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    norm_a = math.sqrt(sum(w * w for w in a.values()))
+    norm_b = math.sqrt(sum(w * w for w in b.values()))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+# ------------------ Index ------------------
+
+class SpecIndex:
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Only ids and term counts are cached; spec and code are read on a hit.
+        self._ids = []
+        self._term_counts = []
+        self._doc_freq = Counter()
+        self._last_id = 0
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    requirements_hash TEXT NOT NULL UNIQUE,
+                    requirements TEXT NOT NULL,
+                    spec TEXT NOT NULL,
+                    code TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refresh(self, conn: sqlite3.Connection):
+        """Pick up entries added since the last lookup, including by other processes."""
+        rows = conn.execute(
+            "SELECT id, requirements FROM entries WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for row in rows:
+            counts = Counter(tokenize(row["requirements"]))
+            self._ids.append(row["id"])
+            self._term_counts.append(counts)
+            self._doc_freq.update(counts.keys())
+            self._last_id = row["id"]
+
+    def _vector(self, counts: Counter) -> dict:
+        # Smoothed IDF so terms seen in every stored document still carry some weight.
+        n_docs = len(self._term_counts)
+        return {
+            term: count * (math.log((1 + n_docs) / (1 + self._doc_freq.get(term, 0))) + 1)
+            for term, count in counts.items()
+        }
+
+    def find_similar(self, requirements: str):
+        """Return the closest prior entry (with its "score") above the threshold, or None."""
+        with self._lock, self._connection() as conn:
+            self._refresh(conn)
+            best_score, best_id = 0.0, None
+            query = self._vector(Counter(tokenize(requirements)))
+            for entry_id, counts in zip(self._ids, self._term_counts):
+                score = cosine_similarity(query, self._vector(counts))
+                if score > best_score:
+                    best_score, best_id = score, entry_id
+
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            row = conn.execute(
+                "SELECT id, requirements, spec, code, created_at FROM entries WHERE id = ?", (best_id,)
+            ).fetchone()
+            return {**dict(row), "score": round(best_score, 4)}
+
+    def add(self, requirements: str, spec: str, code: str):
+        """Record an approved generation, replacing any entry with identical requirements."""
+        requirements_hash = hashlib.sha256(requirements.strip().encode("utf-8")).hexdigest()
+        with self._lock, self._connection() as conn:
+            conn.execute("""
+                INSERT INTO entries (requirements_hash, requirements, spec, code, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(requirements_hash) DO UPDATE SET
+                    spec = excluded.spec, code = excluded.code, created_at = excluded.created_at
+            """, (requirements_hash, requirements, spec, code, time.time()))
+
+    def stats(self) -> dict:
+        with self._lock, self._connection() as conn:
+            self._refresh(conn)
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._ids),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+def load_spec_index() -> SpecIndex:
+    return SpecIndex(
+        path=os.getenv("SPEC_INDEX_PATH", DEFAULT_INDEX_PATH),
+        threshold=float(os.getenv("SPEC_INDEX_THRESHOLD", DEFAULT_THRESHOLD)),
+    )